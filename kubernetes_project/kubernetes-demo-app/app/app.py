@@ -1,18 +1,36 @@
 #!/usr/bin/env python3
 
-from flask import Flask, jsonify, request, g
+from flask import Flask, Response, request, g
+from werkzeug.exceptions import HTTPException
+import atexit
+import itertools
+import queue
+import sys
 import time
 import logging
+import logging.handlers
+import orjson
 import os
 import psutil
 import signal
-import uuid
-from datetime import datetime
 
-# Configure logging level from environment
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
+# Configure logging level from environment. Request handlers only enqueue
+# records; a background listener thread formats and writes them to stdout.
+_log_queue = queue.SimpleQueue()
+_log_output = logging.StreamHandler(sys.stdout)
+_log_output.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_output)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+_log_enqueue = logging.handlers.QueueHandler(_log_queue)
+_log_enqueue.setFormatter(logging.Formatter('%(message)s'))  # final format applied by _log_output
+
 logging.basicConfig(
-    level=getattr(logging, os.environ.get('LOG_LEVEL', 'INFO').upper()),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    level=getattr(logging, LOG_LEVEL.upper()),
+    handlers=[_log_enqueue]
 )
 logger = logging.getLogger(__name__)
 
@@ -26,6 +44,83 @@ startup_time = time.time()
 MIN_UPTIME_SECONDS = int(os.environ.get('MIN_UPTIME_SECONDS', '5'))
 APP_VERSION = os.environ.get('APP_VERSION', '1.0.0')
 ENVIRONMENT = os.environ.get('ENVIRONMENT', 'development')
+POD_NAME = os.environ.get('POD_NAME', 'unknown')
+NODE_NAME = os.environ.get('NODE_NAME', 'unknown')
+POD_NAMESPACE = os.environ.get('POD_NAMESPACE', 'unknown')
+
+# cgroup mount inside the container (v2 unified, or the v1 controller tree)
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# cgroup v1 reports "no memory limit" as a page-aligned LONG_MAX
+_CGROUP_V1_UNLIMITED = 1 << 62
+
+
+def _read_cgroup(name):
+    """Read a cgroup interface file; None when the file does not exist"""
+    try:
+        with open(os.path.join(CGROUP_ROOT, name)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_memory():
+    """(usage file, limit bytes) of a memory-limited cgroup, else None
+
+    Checks cgroup v2 (memory.current / memory.max) first, then cgroup v1
+    as used by EKS AL2 nodes (memory.usage_in_bytes / memory.limit_in_bytes)
+    """
+    limit = _read_cgroup('memory.max')
+    if limit is not None:
+        return None if limit == 'max' else ('memory.current', int(limit))
+    limit = _read_cgroup('memory/memory.limit_in_bytes')
+    if limit is not None and int(limit) < _CGROUP_V1_UNLIMITED:
+        return 'memory/memory.usage_in_bytes', int(limit)
+    return None
+
+
+def _cgroup_cpu_limit_millicores():
+    """Container CPU limit from cpu.max ("<quota> <period>"), None if unlimited"""
+    value = _read_cgroup('cpu.max')
+    if value is None:
+        return None
+    quota, period = value.split()
+    if quota == 'max':
+        return None
+    return int(quota) * 1000 / int(period)
+
+
+# Container resource limits, read from the cgroup with the Kubernetes
+# environment as fallback (e.g. when running outside a container)
+_CGROUP_MEMORY = _cgroup_memory()
+CPU_LIMIT_MILLICORES = (_cgroup_cpu_limit_millicores()
+                        or float(os.environ.get('CPU_LIMIT_MILLICORES', '200')))
+MEMORY_LIMIT_BYTES = (_CGROUP_MEMORY[1] if _CGROUP_MEMORY is not None
+                      else int(os.environ.get('MEMORY_LIMIT_BYTES', '134217728')))
+
+# Most recent system sample; scrapes within _MIN_INTERVAL reuse it
+_MIN_INTERVAL = 1.0
+_last_sample = {'ts': 0.0, 'load': (0.0, 0.0, 0.0), 'mem': None}
+
+# Correlation IDs only need to be unique, not unpredictable: a counter seeded
+# randomly per worker avoids generating and formatting a uuid4 per request
+_next_request_seq = itertools.count(int.from_bytes(os.urandom(4), 'big')).__next__
+
+# WSGI environ keys read by ErrorLoggingMiddleware: the request ID, and a flag
+# marking 500 responses a view built and logged on purpose
+REQUEST_ID_ENVIRON_KEY = 'demo_app.request_id'
+ERROR_LOGGED_ENVIRON_KEY = 'demo_app.error_logged'
+
+# Response timestamp at one-second resolution: [formatted, epoch second]
+_TS_CACHE = ['', 0]
+
+
+def _now_iso():
+    """Current UTC time as ISO 8601, re-formatted at most once per second"""
+    t = int(time.time())
+    if t != _TS_CACHE[1]:
+        _TS_CACHE[:] = [time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(t)), t]
+    return _TS_CACHE[0]
 
 
 def signal_handler(sig, frame):
@@ -37,28 +132,72 @@ def signal_handler(sig, frame):
         'graceful_shutdown': True
     })
 
+    # Chain to the handler installed before ours (e.g. the gunicorn worker's)
+    # so the server still drains in-flight requests and exits
+    previous = _previous_signal_handlers.get(sig)
+    if callable(previous):
+        previous(sig, frame)
+
+
+# Register shutdown handlers, keeping whatever was installed before
+_previous_signal_handlers = {
+    signal.SIGTERM: signal.signal(signal.SIGTERM, signal_handler),
+    signal.SIGINT: signal.signal(signal.SIGINT, signal_handler),
+}
+
+
+class RequestLogAdapter(logging.LoggerAdapter):
+    """Logger bound to the current request's correlation fields"""
 
-# Register shutdown handlers
-signal.signal(signal.SIGTERM, signal_handler)
-signal.signal(signal.SIGINT, signal_handler)
+    def process(self, msg, kwargs):
+        # Merge per-call extra fields over the bound ones instead of replacing them
+        if 'extra' in kwargs:
+            kwargs['extra'] = {**self.extra, **kwargs['extra']}
+        else:
+            kwargs['extra'] = self.extra
+        return msg, kwargs
+
+
+def _request_log():
+    """Request-bound logger, or the module logger if before_request never ran"""
+    return g.get('log', logger)
+
+
+def _sample_system_metrics():
+    """Refresh the cached sample at most once per _MIN_INTERVAL"""
+    now = time.monotonic()
+    if now - _last_sample['ts'] >= _MIN_INTERVAL or _last_sample['mem'] is None:
+        _last_sample['load'] = os.getloadavg()  # single syscall, no warm-up sample needed
+
+        # Container memory from the cgroup (single file read); outside a
+        # memory-limited cgroup fall back to host memory usage via psutil
+        if _CGROUP_MEMORY is not None:
+            _last_sample['mem'] = int(_read_cgroup(_CGROUP_MEMORY[0]))
+        else:
+            _last_sample['mem'] = psutil.virtual_memory().used
+        _last_sample['ts'] = now
+    return _last_sample
 
 
 @app.before_request
 def before_request():
     """Add request correlation ID and start timing"""
-    g.request_id = str(uuid.uuid4())[:8]
-    g.start_time = time.time()
+    g.request_id = format(_next_request_seq() & 0xFFFFFFFF, '08x')
+    request.environ[REQUEST_ID_ENVIRON_KEY] = g.request_id
+    g.log = RequestLogAdapter(logger, {
+        'request_id': g.request_id,
+        'method': request.method,
+        'path': request.path
+    })
+    g.start_time = time.perf_counter()
 
 
 @app.after_request
 def after_request(response):
     """Log request completion with performance metrics"""
-    if hasattr(g, 'start_time') and hasattr(g, 'request_id'):
-        duration_ms = (time.time() - g.start_time) * 1000
-        logger.info("Request completed", extra={
-            'request_id': g.request_id,
-            'method': request.method,
-            'path': request.path,
+    if hasattr(g, 'start_time') and hasattr(g, 'log'):
+        duration_ms = (time.perf_counter() - g.start_time) * 1000
+        g.log.info("Request completed", extra={
             'status_code': response.status_code,
             'duration_ms': round(duration_ms, 2),
             'user_agent': request.headers.get('User-Agent', 'unknown')[:100]
@@ -66,258 +205,343 @@ def after_request(response):
     return response
 
 
+def _json(payload, status=200):
+    """JSON response serialized with orjson instead of Flask's jsonify"""
+    return Response(orjson.dumps(payload), status=status, mimetype='application/json')
+
+
+def _json_prefix(payload):
+    """Serialize the constant fields of a JSON body once, leaving the object open"""
+    return orjson.dumps(payload)[:-1]
+
+
+def _spliced_json(prefix, tail, status):
+    """Build a JSON response from a precomputed prefix and its per-request fields"""
+    return Response(prefix + tail.encode(), status=status, mimetype='application/json',
+                    direct_passthrough=True)
+
+
+# Constant parts of the JSON bodies, serialized at import. Per-request fields
+# (uptime, timestamp, request ID) are spliced onto the end of each.
+_ROOT_PREFIX = _json_prefix({
+    'name': 'Kubernetes Demo API',
+    'version': APP_VERSION,
+    'environment': ENVIRONMENT,
+    'description': 'Simple Flask API demonstrating Kubernetes deployment patterns',
+    'endpoints': {
+        '/': 'API information',
+        '/hello': 'Simple greeting endpoint',
+        '/healthz': 'Liveness probe for Kubernetes',
+        '/readiness': 'Readiness probe for Kubernetes',
+        '/metrics': 'Prometheus metrics for monitoring'
+    }
+})
+
+_HELLO_PREFIX = _json_prefix({
+    'message': 'Hello from Kubernetes Demo API!',
+    'version': APP_VERSION,
+    'environment': ENVIRONMENT,
+    'pod_info': {  # Kubernetes pod metadata
+        'name': POD_NAME,
+        'namespace': POD_NAMESPACE,
+        'node': NODE_NAME
+    }
+})
+
+_HEALTHY_PREFIX = _json_prefix({
+    'status': 'healthy',
+    'version': APP_VERSION
+})
+
+_READY_PREFIX = _json_prefix({
+    'status': 'ready'
+})
+
+_NOT_FOUND_PREFIX = _json_prefix({
+    'error': 'Not Found',
+    'message': 'The requested endpoint does not exist',
+    'available_endpoints': ['/', '/hello', '/healthz', '/readiness', '/metrics']
+})
+
+
 @app.route('/', methods=['GET'])
 def root():
     """API information endpoint"""
-    return jsonify({
-        'name': 'Kubernetes Demo API',
-        'version': APP_VERSION,
-        'environment': ENVIRONMENT,
-        'description': 'Simple Flask API demonstrating Kubernetes deployment patterns',
-        'endpoints': {
-            '/': 'API information',
-            '/hello': 'Simple greeting endpoint',
-            '/healthz': 'Liveness probe for Kubernetes',
-            '/readiness': 'Readiness probe for Kubernetes',
-            '/metrics': 'Prometheus metrics for monitoring'
-        },
-        'uptime_seconds': round(time.time() - startup_time, 2),
-        'timestamp': datetime.utcnow().isoformat(),
-        'request_id': getattr(g, 'request_id', 'unknown')
-    }), 200
+    uptime_seconds = round(time.time() - startup_time, 2)
+    request_id = getattr(g, 'request_id', 'unknown')
+    return _spliced_json(
+        _ROOT_PREFIX,
+        f',"uptime_seconds":{uptime_seconds},"timestamp":"{_now_iso()}","request_id":"{request_id}"}}',
+        200
+    )
 
 
 @app.route('/hello', methods=['GET'])
 def hello():
     """Simple greeting with pod information"""
-    return jsonify({
-        'message': 'Hello from Kubernetes Demo API!',
-        'timestamp': datetime.utcnow().isoformat(),
-        'version': APP_VERSION,
-        'environment': ENVIRONMENT,
-        'pod_info': {  # Kubernetes pod metadata
-            'name': os.environ.get('POD_NAME', 'unknown'),
-            'namespace': os.environ.get('POD_NAMESPACE', 'unknown'),
-            'node': os.environ.get('NODE_NAME', 'unknown')
-        },
-        'request_id': getattr(g, 'request_id', 'unknown')
-    }), 200
+    request_id = getattr(g, 'request_id', 'unknown')
+    return _spliced_json(
+        _HELLO_PREFIX,
+        f',"timestamp":"{_now_iso()}","request_id":"{request_id}"}}',
+        200
+    )
+
+
+def _health_failure(error):
+    """Log a failed liveness check and build its 500 response"""
+    g.log.error("Health check failed", extra={
+        'error': error
+    })
+    request.environ[ERROR_LOGGED_ENVIRON_KEY] = True
+    return _json({
+        'status': 'unhealthy',
+        'error': error,
+        'timestamp': _now_iso(),
+        'request_id': g.request_id
+    }, 500)
 
 
 @app.route('/healthz', methods=['GET'])
 def health_check():
     """Kubernetes liveness probe - returns 200 if app is alive"""
-    try:
-        current_time = time.time()
-        uptime_seconds = current_time - startup_time
+    current_time = time.time()
+    uptime_seconds = current_time - startup_time
 
-        # Basic health validations
-        if uptime_seconds < 0:
-            raise Exception("Invalid uptime calculation")
+    # Basic health validations
+    if uptime_seconds < 0:
+        return _health_failure("Invalid uptime calculation")
 
-        # Check if app received shutdown signal
-        if not app_ready:
-            raise Exception("Application shutting down")
+    # Check if app received shutdown signal
+    if not app_ready:
+        return _health_failure("Application shutting down")
 
-        logger.debug("Health check passed", extra={
-            'request_id': getattr(g, 'request_id', 'unknown'),
+    if logger.isEnabledFor(logging.DEBUG):
+        g.log.debug("Health check passed", extra={
             'uptime_seconds': uptime_seconds
         })
 
-        return jsonify({
-            'status': 'healthy',
-            'uptime_seconds': round(uptime_seconds, 2),
-            'timestamp': datetime.utcnow().isoformat(),
-            'version': APP_VERSION,
-            'request_id': getattr(g, 'request_id', 'unknown')
-        }), 200
-
-    except Exception as e:
-        logger.error("Health check failed", extra={
-            'request_id': getattr(g, 'request_id', 'unknown'),
-            'error': str(e)
-        })
-        return jsonify({
-            'status': 'unhealthy',
-            'error': str(e),
-            'timestamp': datetime.utcnow().isoformat(),
-            'request_id': getattr(g, 'request_id', 'unknown')
-        }), 500
+    return _spliced_json(
+        _HEALTHY_PREFIX,
+        f',"uptime_seconds":{uptime_seconds:.2f},"timestamp":"{_now_iso()}","request_id":"{g.request_id}"}}',
+        200
+    )
 
 
 @app.route('/readiness', methods=['GET'])
 def readiness_check():
     """Kubernetes readiness probe - returns 200 when ready for traffic"""
-    try:
-        # Check if app is marked as ready (graceful shutdown)
-        if not app_ready:
-            return jsonify({
-                'status': 'not_ready',
-                'reason': 'Application not ready to serve traffic',
-                'timestamp': datetime.utcnow().isoformat(),
-                'request_id': getattr(g, 'request_id', 'unknown')
-            }), 503
-
-        current_time = time.time()
-        uptime_seconds = current_time - startup_time
-
-        # Require minimum uptime to prevent startup race conditions
-        if uptime_seconds < MIN_UPTIME_SECONDS:
-            return jsonify({
-                'status': 'not_ready',
-                'reason': f'Minimum uptime not reached ({uptime_seconds:.1f}s < {MIN_UPTIME_SECONDS}s)',
-                'timestamp': datetime.utcnow().isoformat(),
-                'request_id': getattr(g, 'request_id', 'unknown')
-            }), 503
-
-        logger.debug("Readiness check passed", extra={
-            'request_id': getattr(g, 'request_id', 'unknown'),
-            'uptime_seconds': uptime_seconds
-        })
+    # Check if app is marked as ready (graceful shutdown)
+    if not app_ready:
+        return _json({
+            'status': 'not_ready',
+            'reason': 'Application not ready to serve traffic',
+            'timestamp': _now_iso(),
+            'request_id': g.request_id
+        }, 503)
 
-        return jsonify({
-            'status': 'ready',
-            'uptime_seconds': round(uptime_seconds, 2),
-            'timestamp': datetime.utcnow().isoformat(),
-            'request_id': getattr(g, 'request_id', 'unknown')
-        }), 200
+    current_time = time.time()
+    uptime_seconds = current_time - startup_time
 
-    except Exception as e:
-        logger.error("Readiness check failed", extra={
-            'request_id': getattr(g, 'request_id', 'unknown'),
-            'error': str(e)
-        })
-        return jsonify({
+    # Require minimum uptime to prevent startup race conditions
+    if uptime_seconds < MIN_UPTIME_SECONDS:
+        return _json({
             'status': 'not_ready',
-            'error': str(e),
-            'timestamp': datetime.utcnow().isoformat(),
-            'request_id': getattr(g, 'request_id', 'unknown')
-        }), 503
+            'reason': f'Minimum uptime not reached ({uptime_seconds:.1f}s < {MIN_UPTIME_SECONDS}s)',
+            'timestamp': _now_iso(),
+            'request_id': g.request_id
+        }, 503)
 
+    if logger.isEnabledFor(logging.DEBUG):
+        g.log.debug("Readiness check passed", extra={
+            'uptime_seconds': uptime_seconds
+        })
 
-@app.route('/metrics', methods=['GET'])
-def metrics():
-    """Prometheus metrics endpoint - exposes application and system metrics"""
-    try:
-        current_time = time.time()
-        uptime_seconds = current_time - startup_time
-
-        # Get host system metrics (non-blocking call)
-        cpu_percent = psutil.cpu_percent(interval=None)
-        memory = psutil.virtual_memory()
-        memory_percent = memory.percent
+    return _spliced_json(
+        _READY_PREFIX,
+        f',"uptime_seconds":{uptime_seconds:.2f},"timestamp":"{_now_iso()}","request_id":"{g.request_id}"}}',
+        200
+    )
 
-        # Get container resource limits from Kubernetes environment
-        cpu_limit_millicores = float(os.environ.get('CPU_LIMIT_MILLICORES', '200'))
-        memory_limit_bytes = int(os.environ.get('MEMORY_LIMIT_BYTES', '134217728'))
 
-        # Generate Prometheus format metrics
-        metrics_output = f'''# HELP demo_app_info Application information
+# Prometheus payload sections that never change for the life of the process,
+# rendered once at import
+_METRICS_INFO = f'''# HELP demo_app_info Application information
 # TYPE demo_app_info gauge
-demo_app_info{{version="{APP_VERSION}",environment="{ENVIRONMENT}",pod="{os.environ.get('POD_NAME', 'unknown')}",node="{os.environ.get('NODE_NAME', 'unknown')}"}} 1
+demo_app_info{{version="{APP_VERSION}",environment="{ENVIRONMENT}",pod="{POD_NAME}",node="{NODE_NAME}"}} 1
 
-# HELP demo_app_uptime_seconds Total uptime of the application
+'''.encode()
+
+_METRICS_DYNAMIC_TEMPLATE = '''# HELP demo_app_uptime_seconds Total uptime of the application
 # TYPE demo_app_uptime_seconds counter
-demo_app_uptime_seconds {uptime_seconds:.2f}
+demo_app_uptime_seconds %.2f
 
 # HELP demo_app_ready Application readiness status (1=ready, 0=not ready)
 # TYPE demo_app_ready gauge
-demo_app_ready {1 if app_ready else 0}
+demo_app_ready %d
 
 # Host system metrics (note: these reflect the host, not container limits)
-# HELP demo_app_host_cpu_percent Host CPU utilization percentage
-# TYPE demo_app_host_cpu_percent gauge
-demo_app_host_cpu_percent {cpu_percent:.2f}
+# HELP demo_app_host_loadavg_1m Host load average over 1 minute
+# TYPE demo_app_host_loadavg_1m gauge
+demo_app_host_loadavg_1m %.2f
+
+# HELP demo_app_host_loadavg_5m Host load average over 5 minutes
+# TYPE demo_app_host_loadavg_5m gauge
+demo_app_host_loadavg_5m %.2f
+
+# HELP demo_app_host_loadavg_15m Host load average over 15 minutes
+# TYPE demo_app_host_loadavg_15m gauge
+demo_app_host_loadavg_15m %.2f
 
-# HELP demo_app_host_memory_percent Host memory utilization percentage
-# TYPE demo_app_host_memory_percent gauge
-demo_app_host_memory_percent {memory_percent:.2f}
+'''
+
+# Memory gauges: container usage against its limit when both come from the
+# cgroup, otherwise host memory under its own name
+if _CGROUP_MEMORY is not None:
+    _METRICS_DYNAMIC_TEMPLATE += '''# Container metrics from the cgroup
+# HELP demo_app_memory_usage_bytes Container memory usage in bytes
+# TYPE demo_app_memory_usage_bytes gauge
+demo_app_memory_usage_bytes %d
 
-# HELP demo_app_host_memory_bytes Host memory usage in bytes
-# TYPE demo_app_host_memory_bytes gauge
-demo_app_host_memory_bytes {memory.used}
+# HELP demo_app_memory_usage_percent Container memory usage as a percentage of its limit
+# TYPE demo_app_memory_usage_percent gauge
+demo_app_memory_usage_percent %.2f
 
-# Container resource configuration (for reference)
+'''
+else:
+    _METRICS_DYNAMIC_TEMPLATE += '''# Host memory (not running in a memory-limited cgroup)
+# HELP demo_app_host_memory_used_bytes Host memory in use in bytes
+# TYPE demo_app_host_memory_used_bytes gauge
+demo_app_host_memory_used_bytes %d
+
+'''
+
+_METRICS_CONFIG = f'''# Container resource configuration (for reference)
 # HELP demo_app_cpu_limit_millicores Configured CPU limit in millicores
 # TYPE demo_app_cpu_limit_millicores gauge
-demo_app_cpu_limit_millicores {cpu_limit_millicores}
+demo_app_cpu_limit_millicores {CPU_LIMIT_MILLICORES}
 
 # HELP demo_app_memory_limit_bytes Configured memory limit in bytes
 # TYPE demo_app_memory_limit_bytes gauge
-demo_app_memory_limit_bytes {memory_limit_bytes}
+demo_app_memory_limit_bytes {MEMORY_LIMIT_BYTES}
 
 # HELP demo_app_min_uptime_seconds Configured minimum uptime for readiness
 # TYPE demo_app_min_uptime_seconds gauge
 demo_app_min_uptime_seconds {MIN_UPTIME_SECONDS}
-'''
+'''.encode()
 
-        logger.debug("Metrics generated", extra={
-            'request_id': getattr(g, 'request_id', 'unknown'),
-            'host_cpu_percent': cpu_percent,
-            'host_memory_percent': memory_percent,
-            'uptime_seconds': uptime_seconds
-        })
 
-        return metrics_output, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics endpoint - exposes application and system metrics"""
+    try:
+        current_time = time.time()
+        uptime_seconds = current_time - startup_time
+
+        # Get host and container metrics (cached between close scrapes)
+        sample = _sample_system_metrics()
+        load1, load5, load15 = sample['load']
+        memory_used = sample['mem']
+        if _CGROUP_MEMORY is not None:
+            memory_values = (memory_used, memory_used * 100.0 / _CGROUP_MEMORY[1])
+        else:
+            memory_values = (memory_used,)
+
+        # Only the gauges that change between scrapes are formatted per request
+        metrics_output = _METRICS_INFO + (_METRICS_DYNAMIC_TEMPLATE % ((
+            uptime_seconds,
+            1 if app_ready else 0,
+            load1,
+            load5,
+            load15
+        ) + memory_values)).encode() + _METRICS_CONFIG
+
+        if logger.isEnabledFor(logging.DEBUG):
+            g.log.debug("Metrics generated", extra={
+                'host_loadavg_1m': load1,
+                'memory_used_bytes': memory_used,
+                'uptime_seconds': uptime_seconds
+            })
+
+        return Response(metrics_output, status=200, content_type='text/plain; charset=utf-8',
+                        direct_passthrough=True)
 
     except Exception as e:
-        logger.error("Metrics generation failed", extra={
-            'request_id': getattr(g, 'request_id', 'unknown'),
+        g.log.error("Metrics generation failed", extra={
             'error': str(e)
         })
-        return jsonify({
+        request.environ[ERROR_LOGGED_ENVIRON_KEY] = True
+        return _json({
             'error': 'Internal Server Error',
             'message': 'Metrics generation failed',
             'request_id': getattr(g, 'request_id', 'unknown')
-        }), 500
+        }, 500)
 
 
 # Error handlers for better observability
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors with helpful response"""
-    logger.warning("404 error", extra={
-        'request_id': getattr(g, 'request_id', 'unknown'),
-        'path': request.path,
-        'method': request.method
-    })
-    return jsonify({
-        'error': 'Not Found',
-        'message': 'The requested endpoint does not exist',
-        'available_endpoints': ['/', '/hello', '/healthz', '/readiness', '/metrics'],
-        'request_id': getattr(g, 'request_id', 'unknown')
-    }), 404
+    _request_log().warning("404 error")
+    request_id = getattr(g, 'request_id', 'unknown')
+    return _spliced_json(_NOT_FOUND_PREFIX, f',"request_id":"{request_id}"}}', 404)
 
 
 @app.errorhandler(500)
 def internal_error(error):
-    """Handle 500 errors with correlation ID"""
-    logger.error("500 error", extra={
-        'request_id': getattr(g, 'request_id', 'unknown'),
-        'error': str(error)
-    })
-    return jsonify({
+    """Handle 500 errors with correlation ID (logged by ErrorLoggingMiddleware)"""
+    return _json({
         'error': 'Internal Server Error',
         'message': 'An unexpected error occurred',
         'request_id': getattr(g, 'request_id', 'unknown')
-    }), 500
+    }, 500)
 
 
-@app.errorhandler(Exception)
-def handle_exception(e):
-    """Catch-all exception handler"""
-    logger.error("Unhandled exception", extra={
-        'request_id': getattr(g, 'request_id', 'unknown'),
-        'exception': str(e),
-        'type': type(e).__name__
+@app.errorhandler(HTTPException)
+def http_error(error):
+    """Return any other HTTP error (405, 400, ...) as JSON"""
+    _request_log().warning("HTTP error", extra={
+        'status_code': error.code
     })
-    return jsonify({
-        'error': 'Internal Server Error',
-        'message': 'An unexpected error occurred',
+    response = _json({
+        'error': error.name,
+        'message': error.description,
         'request_id': getattr(g, 'request_id', 'unknown')
-    }), 500
+    }, error.code)
+    # Keep the headers Werkzeug attaches to the error, e.g. Allow on a 405
+    for name, value in error.get_headers(request.environ):
+        if name.lower() != 'content-type':
+            response.headers.add(name, value)
+    return response
+
+
+class ErrorLoggingMiddleware:
+    """WSGI middleware that logs unexpected 500 responses with their correlation ID.
+
+    Unhandled exceptions reach the 500 handler above, and Flask logs their
+    traceback itself, so no catch-all exception handler is registered.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        def logging_start_response(status, headers, exc_info=None):
+            if status.startswith('500') and not environ.get(ERROR_LOGGED_ENVIRON_KEY):
+                logger.error("500 error", extra={
+                    'request_id': environ.get(REQUEST_ID_ENVIRON_KEY, 'unknown'),
+                    'method': environ.get('REQUEST_METHOD'),
+                    'path': environ.get('PATH_INFO')
+                })
+            return start_response(status, headers, exc_info)
+
+        return self.wsgi_app(environ, logging_start_response)
+
+
+app.wsgi_app = ErrorLoggingMiddleware(app.wsgi_app)
 
 
+# Local development entry point only - containers run the app under gunicorn
+# (see gunicorn.conf.py), which forwards SIGTERM from the master to each worker
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug_mode = os.environ.get('DEBUG', 'false').lower() == 'true'
@@ -329,7 +553,7 @@ if __name__ == '__main__':
         'version': APP_VERSION,
         'debug': debug_mode,
         'min_uptime_seconds': MIN_UPTIME_SECONDS,
-        'log_level': os.environ.get('LOG_LEVEL', 'INFO')
+        'log_level': LOG_LEVEL
     })
 
     # Run Flask application on all interfaces for container networking
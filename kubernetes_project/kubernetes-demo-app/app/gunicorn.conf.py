@@ -0,0 +1,26 @@
+# gunicorn.conf.py
+"""
+Gunicorn configuration for the Kubernetes Demo API.
+Loaded automatically by gunicorn from the working directory.
+"""
+
+import multiprocessing
+import os
+
+# Bind on all interfaces for container networking
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Cooperative gevent workers - every endpoint is I/O-bound, so one worker
+# can serve many concurrent connections without probes queueing behind /metrics
+worker_class = 'gevent'
+workers = int(os.environ.get('WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', '1000'))
+
+# Stay within the pod's terminationGracePeriodSeconds (30s)
+graceful_timeout = 25
+timeout = 30
+
+# Logs go to stdout/stderr for the container runtime to collect
+accesslog = None
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'INFO').lower()
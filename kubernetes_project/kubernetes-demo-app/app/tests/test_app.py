@@ -0,0 +1,96 @@
+import json
+import logging
+from unittest import mock
+
+import pytest
+
+import app as demo_app
+
+
+@demo_app.app.route('/boom', methods=['GET'])
+def boom():
+    """Test-only route that fails without handling its exception"""
+    raise RuntimeError('boom')
+
+
+@pytest.fixture
+def client():
+    return demo_app.app.test_client()
+
+
+def _messages(caplog, message):
+    return [record for record in caplog.records if record.getMessage() == message]
+
+
+# Top-level keys of each body as built by jsonify before the prefixes
+# were precomputed; the spliced output must still parse to the same shape
+@pytest.mark.parametrize('path, patches, status, keys', [
+    pytest.param('/', {'app_ready': True}, 200,
+                 {'name', 'version', 'environment', 'description', 'endpoints',
+                  'uptime_seconds', 'timestamp', 'request_id'}, id='root'),
+    pytest.param('/hello', {'app_ready': True}, 200,
+                 {'message', 'timestamp', 'version', 'environment', 'pod_info',
+                  'request_id'}, id='hello'),
+    pytest.param('/healthz', {'app_ready': True}, 200,
+                 {'status', 'uptime_seconds', 'timestamp', 'version', 'request_id'},
+                 id='healthz'),
+    pytest.param('/readiness', {'startup_time': 0.0}, 200,
+                 {'status', 'uptime_seconds', 'timestamp', 'request_id'},
+                 id='readiness-ready'),
+    pytest.param('/readiness', {'app_ready': False}, 503,
+                 {'status', 'reason', 'timestamp', 'request_id'},
+                 id='readiness-not-ready'),
+    pytest.param('/missing', {'app_ready': True}, 404,
+                 {'error', 'message', 'available_endpoints', 'request_id'},
+                 id='not-found'),
+])
+def test_json_bodies_parse_with_original_keys(client, path, patches, status, keys):
+    """Test spliced JSON bodies are valid and keep the jsonify keys"""
+    with mock.patch.multiple(demo_app, **patches):
+        response = client.get(path)
+
+    assert response.status_code == status
+    body = json.loads(response.data)
+    assert set(body) == keys
+    if path == '/hello':
+        assert set(body['pod_info']) == {'name', 'namespace', 'node'}
+
+
+def test_not_found_returns_json(client):
+    """Test unknown paths get the JSON 404 body"""
+    response = client.get('/missing')
+
+    assert response.status_code == 404
+    assert response.mimetype == 'application/json'
+    assert response.get_json()['error'] == 'Not Found'
+
+
+def test_method_not_allowed_keeps_allow_header(client):
+    """Test a 405 keeps the Allow header Werkzeug sets"""
+    response = client.post('/healthz')
+
+    assert response.status_code == 405
+    assert response.mimetype == 'application/json'
+    assert 'GET' in response.headers['Allow']
+    assert response.get_json()['error'] == 'Method Not Allowed'
+
+
+def test_unhandled_exception_logged_once(client, caplog):
+    """Test an unhandled exception returns 500 and logs "500 error" once"""
+    with caplog.at_level(logging.INFO):
+        response = client.get('/boom')
+
+    assert response.status_code == 500
+    assert response.get_json()['message'] == 'An unexpected error occurred'
+    assert len(_messages(caplog, '500 error')) == 1
+
+
+def test_unhealthy_liveness_logged_once(client, caplog):
+    """Test a failed liveness check is logged by the view only"""
+    with mock.patch.object(demo_app, 'app_ready', False), caplog.at_level(logging.INFO):
+        response = client.get('/healthz')
+
+    assert response.status_code == 500
+    assert response.get_json()['status'] == 'unhealthy'
+    assert len(_messages(caplog, 'Health check failed')) == 1
+    assert not _messages(caplog, '500 error')
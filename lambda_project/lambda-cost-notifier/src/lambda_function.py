@@ -5,105 +5,211 @@ Queries AWS Cost Explorer and sends daily cost summary emails via SES.
 """
 
 import boto3
+import heapq
+import html
+import io
 import json
 import time
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
 from typing import Dict, Any
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
+# Configuration from environment variables, read once per execution environment
+TRACKING_TABLE = os.environ.get('TRACKING_TABLE', 'aws-cost-notifier-tracking')
+ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@company.com')
+SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'noreply@company.com')
+SES_REGION = os.environ.get('SES_REGION', 'us-east-1')
+
+
+# How long a pending claim blocks other runs: just above the 60s Lambda
+# timeout, so a run killed mid-send can be retaken by EventBridge's retries
+CLAIM_TIMEOUT = timedelta(seconds=120)
+
 
 class CostNotifierError(Exception):
     """Custom exception for cost notifier failures"""
     pass
 
 
-def already_sent_today() -> bool:
-    """Check if cost report was already sent for today."""
+# HTML email templates, built once at import
+HTML_HEADER_TEMPLATE = """
+    <html>
+    <body style="font-family: Arial, sans-serif; margin: 20px;">
+        <h2>AWS Daily Cost Report - {date_str}</h2>
+
+        <div style="background-color: #e8f4fd; padding: 15px; border-radius: 5px; margin: 20px 0;">
+            <h3>Total Cost: ${total:.2f}</h3>
+        </div>
+
+        <h3>Top Services:</h3>
+        <table style="border-collapse: collapse; width: 100%;">
+            <tr style="background-color: #f2f2f2;">
+                <th style="border: 1px solid #ddd; padding: 8px; text-align: left;">Service</th>
+                <th style="border: 1px solid #ddd; padding: 8px; text-align: left;">Cost</th>
+            </tr>
+    """
+
+HTML_ROW_TEMPLATE = """
+            <tr>
+                <td style="border: 1px solid #ddd; padding: 8px;">%s</td>
+                <td style="border: 1px solid #ddd; padding: 8px;">$%.2f</td>
+            </tr>
+            """
+
+HTML_FOOTER = """
+        </table>
+        <p style="margin-top: 30px; font-size: 12px; color: #666;">
+            Generated automatically by AWS Cost Notifier
+        </p>
+    </body>
+    </html>
+    """
+
+
+# Retries with backoff are handled by botocore, which knows each service's
+# throttling and transient error codes
+RETRY_CONFIG = Config(retries={'max_attempts': 5, 'mode': 'adaptive'})
+
+
+# AWS clients are created on first use and then kept for the lifetime of the
+# execution environment, so warm invocations skip client construction.
+@lru_cache(maxsize=None)
+def _tracking_table():
+    """DynamoDB tracking table handle."""
+    dynamodb = boto3.resource('dynamodb', config=RETRY_CONFIG)
+    return dynamodb.Table(TRACKING_TABLE)
+
+
+@lru_cache(maxsize=None)
+def _cost_explorer():
+    """Cost Explorer client (the API is only served from us-east-1)."""
+    return boto3.client('ce', region_name='us-east-1', config=RETRY_CONFIG)
+
+
+@lru_cache(maxsize=None)
+def _ses():
+    """SES client for the configured sending region."""
+    return boto3.client('ses', region_name=SES_REGION, config=RETRY_CONFIG)
+
+
+def claim_report(report_date: str) -> bool:
+    """Claim the report date with a conditional write; False if already sent.
+
+    Raises CostNotifierError while another run holds a live pending claim,
+    so the invocation fails and is retried instead of dropping the report.
+    """
+    now = datetime.utcnow()
     try:
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(os.environ.get('TRACKING_TABLE', 'aws-cost-notifier-tracking'))
+        # A single conditional PutItem replaces the old read-then-write check.
+        # Pending claims older than CLAIM_TIMEOUT (a crashed run) may be retaken.
+        _tracking_table().put_item(
+            Item={
+                'report_date': report_date,
+                'claimed_timestamp': now.isoformat(),
+                'status': 'pending'
+            },
+            ConditionExpression=(
+                'attribute_not_exists(report_date) OR '
+                '(#status = :pending AND claimed_timestamp < :stale_before)'
+            ),
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':pending': 'pending',
+                ':stale_before': (now - CLAIM_TIMEOUT).isoformat()
+            },
+            # Return the existing record to tell "sent" from "in progress"
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+        return True
+
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            # Error responses are not deserialized by the resource layer,
+            # so the old item arrives in DynamoDB JSON ({'S': ...})
+            old_status = e.response.get('Item', {}).get('status', {}).get('S')
+            if old_status == 'pending':
+                raise CostNotifierError(f"Report for {report_date} is being sent by another run")
+            logger.info("Report already sent for %s", report_date)
+            return False
+        logger.error("Error claiming tracking record: %s", e)
+        return True  # On error, assume not sent
+
+    except Exception as e:
+        logger.error("Error claiming tracking record: %s", e)
+        return True  # On error, assume not sent
 
-        today = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
-        response = table.get_item(Key={'report_date': today})
 
-        if 'Item' in response:
-            logger.info(f"Report already sent for {today}")
-            return True
-        return False
+def release_claim(report_date: str) -> None:
+    """Drop a pending claim so a later run can retry the report."""
+    try:
+        _tracking_table().delete_item(
+            Key={'report_date': report_date},
+            ConditionExpression='#status = :pending',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':pending': 'pending'}
+        )
+        logger.info("Released claim for %s", report_date)
 
     except Exception as e:
-        logger.error(f"Error checking tracking table: {e}")
-        return False  # On error, assume not sent
+        logger.error("Error releasing tracking record: %s", e)
 
 
-def mark_as_sent(message_id: str) -> None:
-    """Mark today's report as sent."""
+def mark_as_sent(report_date: str, message_id: str) -> None:
+    """Mark the claimed report as sent."""
     try:
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(os.environ.get('TRACKING_TABLE', 'aws-cost-notifier-tracking'))
-
-        today = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
-        table.put_item(Item={
-            'report_date': today,
-            'sent_timestamp': datetime.utcnow().isoformat(),
-            'status': 'sent',
-            'email_message_id': message_id
-        })
-        logger.info(f"Marked {today} as sent")
+        _tracking_table().update_item(
+            Key={'report_date': report_date},
+            UpdateExpression='SET #status = :sent, sent_timestamp = :ts, email_message_id = :mid',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':sent': 'sent',
+                ':ts': datetime.utcnow().isoformat(),
+                ':mid': message_id
+            }
+        )
+        logger.info("Marked %s as sent", report_date)
 
     except Exception as e:
-        logger.error(f"Error updating tracking table: {e}")
+        logger.error("Error updating tracking table: %s", e)
 
 
 def get_cost_data() -> Dict[str, Any]:
-    """Retrieve yesterday's cost data from Cost Explorer with retry."""
-    max_retries = 3
-
+    """Retrieve yesterday's cost data from Cost Explorer."""
     # Get yesterday's date
     yesterday = datetime.utcnow().date() - timedelta(days=1)
     today = datetime.utcnow().date()
 
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Getting cost data for {yesterday} (attempt {attempt + 1})")
-
-            cost_explorer = boto3.client('ce', region_name='us-east-1')
-            response = cost_explorer.get_cost_and_usage(
-                TimePeriod={
-                    'Start': yesterday.strftime('%Y-%m-%d'),
-                    'End': today.strftime('%Y-%m-%d')
-                },
-                Granularity='DAILY',
-                Metrics=['BlendedCost'],
-                GroupBy=[{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
-            )
-
-            logger.info("Successfully retrieved cost data")
-            return response
-
-        except ClientError as e:
-            error_code = e.response['Error']['Code']
-            if error_code in ['Throttling', 'RequestLimitExceeded'] and attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                logger.warning(f"Cost Explorer throttled, waiting {wait_time}s")
-                time.sleep(wait_time)
-                continue
-            else:
-                raise CostNotifierError(f"Cost Explorer API failed: {error_code}")
-
-        except Exception as e:
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-                continue
-            raise CostNotifierError(f"Failed to get cost data: {e}")
-
-    raise CostNotifierError("Exhausted all retry attempts")
+    try:
+        logger.info("Getting cost data for %s", yesterday)
+
+        response = _cost_explorer().get_cost_and_usage(
+            TimePeriod={
+                'Start': yesterday.strftime('%Y-%m-%d'),
+                'End': today.strftime('%Y-%m-%d')
+            },
+            Granularity='DAILY',
+            Metrics=['BlendedCost'],
+            GroupBy=[{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
+        )
+
+        logger.info("Successfully retrieved cost data")
+        return response
+
+    except ClientError as e:
+        raise CostNotifierError(f"Cost Explorer API failed: {e.response['Error']['Code']}")
+
+    except Exception as e:
+        raise CostNotifierError(f"Failed to get cost data: {e}")
 
 
 def format_email(cost_data: Dict[str, Any]) -> Dict[str, str]:
@@ -119,63 +225,35 @@ def format_email(cost_data: Dict[str, Any]) -> Dict[str, str]:
     date_str = result['TimePeriod']['Start']
     total_cost = float(result['Total']['BlendedCost']['Amount'])
 
-    # Sort services by cost (top 10)
-    services = sorted(
-        result['Groups'],
-        key=lambda x: float(x['Metrics']['BlendedCost']['Amount']),
-        reverse=True
-    )[:10]
+    # Parse each service cost once, then keep the top 10 without a full sort
+    costs = [
+        (float(group['Metrics']['BlendedCost']['Amount']), group['Keys'][0])
+        for group in result['Groups']
+    ]
+    services = [
+        (service_name, service_cost)
+        for service_cost, service_name in heapq.nlargest(10, costs, key=itemgetter(0))
+        if service_cost >= 0.01  # Only show services > 1 cent
+    ]
 
     # Create text version
-    text_content = f"""AWS Daily Cost Report - {date_str}
+    text_parts = [f"""AWS Daily Cost Report - {date_str}
 
 Total Cost: ${total_cost:.2f}
 
 Top Services:
-"""
-    for service in services:
-        service_name = service['Keys'][0]
-        service_cost = float(service['Metrics']['BlendedCost']['Amount'])
-        if service_cost >= 0.01:  # Only show services > 1 cent
-            text_content += f"  {service_name}: ${service_cost:.2f}\n"
-
-    # Create HTML version
-    html_content = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; margin: 20px;">
-        <h2>AWS Daily Cost Report - {date_str}</h2>
-
-        <div style="background-color: #e8f4fd; padding: 15px; border-radius: 5px; margin: 20px 0;">
-            <h3>Total Cost: ${total_cost:.2f}</h3>
-        </div>
-
-        <h3>Top Services:</h3>
-        <table style="border-collapse: collapse; width: 100%;">
-            <tr style="background-color: #f2f2f2;">
-                <th style="border: 1px solid #ddd; padding: 8px; text-align: left;">Service</th>
-                <th style="border: 1px solid #ddd; padding: 8px; text-align: left;">Cost</th>
-            </tr>
-    """
-
-    for service in services:
-        service_name = service['Keys'][0]
-        service_cost = float(service['Metrics']['BlendedCost']['Amount'])
-        if service_cost >= 0.01:
-            html_content += f"""
-            <tr>
-                <td style="border: 1px solid #ddd; padding: 8px;">{service_name}</td>
-                <td style="border: 1px solid #ddd; padding: 8px;">${service_cost:.2f}</td>
-            </tr>
-            """
-
-    html_content += """
-        </table>
-        <p style="margin-top: 30px; font-size: 12px; color: #666;">
-            Generated automatically by AWS Cost Notifier
-        </p>
-    </body>
-    </html>
-    """
+"""]
+    for service_name, service_cost in services:
+        text_parts.append(f"  {service_name}: ${service_cost:.2f}\n")
+    text_content = ''.join(text_parts)
+
+    # Create HTML version (service names come from AWS and are escaped)
+    buf = io.StringIO()
+    buf.write(HTML_HEADER_TEMPLATE.format(date_str=date_str, total=total_cost))
+    for service_name, service_cost in services:
+        buf.write(HTML_ROW_TEMPLATE % (html.escape(service_name), service_cost))
+    buf.write(HTML_FOOTER)
+    html_content = buf.getvalue()
 
     return {
         'subject': f'AWS Daily Cost Report - ${total_cost:.2f}',
@@ -185,63 +263,55 @@ Top Services:
 
 
 def send_email(email_content: Dict[str, str]) -> Dict[str, Any]:
-    """Send email via SES with retry."""
-    max_retries = 3
-
-    admin_email = os.environ.get('ADMIN_EMAIL', 'admin@company.com')
-    sender_email = os.environ.get('SENDER_EMAIL', 'noreply@company.com')
-    ses_region = os.environ.get('SES_REGION', 'us-east-1')
-
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Sending email (attempt {attempt + 1})")
-
-            ses = boto3.client('ses', region_name=ses_region)
-
-            response = ses.send_email(
-                Source=sender_email,
-                Destination={'ToAddresses': [admin_email]},
-                Message={
-                    'Subject': {'Data': email_content['subject']},
-                    'Body': {
-                        'Html': {'Data': email_content['html']},
-                        'Text': {'Data': email_content['text']}
-                    }
+    """Send email via SES."""
+    try:
+        logger.info("Sending email")
+
+        response = _ses().send_email(
+            Source=SENDER_EMAIL,
+            Destination={'ToAddresses': [ADMIN_EMAIL]},
+            Message={
+                'Subject': {'Data': email_content['subject']},
+                'Body': {
+                    'Html': {'Data': email_content['html']},
+                    'Text': {'Data': email_content['text']}
                 }
-            )
-
-            logger.info(f"Email sent successfully: {response.get('MessageId')}")
-            return response
+            }
+        )
 
-        except ClientError as e:
-            error_code = e.response['Error']['Code']
-            if error_code in ['Throttling', 'SendingPausedException'] and attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                logger.warning(f"SES throttled, waiting {wait_time}s")
-                time.sleep(wait_time)
-                continue
-            else:
-                raise CostNotifierError(f"SES email failed: {error_code}")
+        logger.info("Email sent successfully: %s", response.get('MessageId'))
+        return response
 
-        except Exception as e:
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-                continue
-            raise CostNotifierError(f"Failed to send email: {e}")
+    except ClientError as e:
+        raise CostNotifierError(f"SES email failed: {e.response['Error']['Code']}")
 
-    raise CostNotifierError("Exhausted all email retry attempts")
+    except Exception as e:
+        raise CostNotifierError(f"Failed to send email: {e}")
 
 
 def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
     """Main Lambda handler."""
-    start_time = time.time()
+    start_time = time.monotonic()  # elapsed time only, immune to clock adjustments
     request_id = getattr(context, 'aws_request_id', 'unknown')
 
-    logger.info(f"Starting cost notifier execution - Request ID: {request_id}")
+    logger.info("Starting cost notifier execution - Request ID: %s", request_id)
 
     try:
-        # Check if already sent today
-        if already_sent_today():
+        report_date = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
+
+        # Create clients on this thread first; building them from boto3's
+        # default session is not thread-safe
+        _tracking_table()
+        _cost_explorer()
+
+        # Claiming yesterday's report and querying its costs are independent,
+        # so overlap the DynamoDB and Cost Explorer round trips
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            claim_future = pool.submit(claim_report, report_date)
+            cost_future = pool.submit(get_cost_data)
+
+        # Claim fails if the report was already sent; discard the cost data
+        if not claim_future.result():
             return {
                 'statusCode': 200,
                 'body': json.dumps({
@@ -250,26 +320,31 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
                 })
             }
 
-        # Get cost data
-        cost_data = get_cost_data()
+        try:
+            # Get cost data (re-raises any Cost Explorer failure)
+            cost_data = cost_future.result()
+
+            # Format email
+            email_content = format_email(cost_data)
 
-        # Format email
-        email_content = format_email(cost_data)
+            # Send email
+            email_result = send_email(email_content)
 
-        # Send email
-        email_result = send_email(email_content)
+        except Exception:
+            release_claim(report_date)  # Nothing was sent, let a retry claim it
+            raise
 
         # Mark as sent
-        mark_as_sent(email_result.get('MessageId', ''))
+        mark_as_sent(report_date, email_result.get('MessageId', ''))
 
         # Calculate execution time
-        execution_time = time.time() - start_time
+        execution_time = time.monotonic() - start_time
 
         # Log SLO compliance
         if execution_time > 30:
-            logger.warning(f"Execution time {execution_time:.1f}s exceeded 30s SLO")
+            logger.warning("Execution time %.1fs exceeded 30s SLO", execution_time)
 
-        logger.info(f"Cost notification completed successfully in {execution_time:.1f}s")
+        logger.info("Cost notification completed successfully in %.1fs", execution_time)
 
         return {
             'statusCode': 200,
@@ -281,6 +356,6 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        execution_time = time.time() - start_time
-        logger.error(f"Cost notifier failed after {execution_time:.1f}s: {str(e)}")
+        execution_time = time.monotonic() - start_time
+        logger.error("Cost notifier failed after %.1fs: %s", execution_time, e)
         raise  # Re-raise to trigger CloudWatch alarms
\ No newline at end of file
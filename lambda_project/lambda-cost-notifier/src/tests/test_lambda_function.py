@@ -1,42 +1,150 @@
-import sys
-import os
+import json
+import re
+from types import MappingProxyType
+from unittest import mock
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import pytest
+from botocore.exceptions import ClientError
 
+import lambda_function
+from lambda_function import format_email
 
-def test_format_email_with_data():
-    """Test email formatting with realistic cost data"""
-    from lambda_function import format_email
 
-    data = {
-        'ResultsByTime': [{
-            'TimePeriod': {'Start': '2024-09-16'},
-            'Total': {'BlendedCost': {'Amount': '123.45'}},
-            'Groups': [
-                {'Keys': ['Amazon S3'], 'Metrics': {'BlendedCost': {'Amount': '50.00'}}},
-                {'Keys': ['Amazon EC2'], 'Metrics': {'BlendedCost': {'Amount': '73.45'}}}
-            ]
-        }]
-    }
+def _frozen(value):
+    """Deeply read-only copy: dicts become mapping proxies, lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _frozen(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_frozen(item) for item in value)
+    return value
 
+
+# Sample Cost Explorer responses, built once and shared read-only by the tests
+_SAMPLE_COST_DATA = _frozen({
+    'ResultsByTime': [{
+        'TimePeriod': {'Start': '2024-09-16'},
+        'Total': {'BlendedCost': {'Amount': '123.45'}},
+        'Groups': [
+            {'Keys': ['Amazon S3'], 'Metrics': {'BlendedCost': {'Amount': '50.00'}}},
+            {'Keys': ['Amazon EC2'], 'Metrics': {'BlendedCost': {'Amount': '73.45'}}}
+        ]
+    }]
+})
+
+_EMPTY_COST_DATA = _frozen({'ResultsByTime': []})
+
+_UNSAFE_NAME_COST_DATA = _frozen({
+    'ResultsByTime': [{
+        'TimePeriod': {'Start': '2024-09-16'},
+        'Total': {'BlendedCost': {'Amount': '10.00'}},
+        'Groups': [
+            {'Keys': ['<script>alert(1)</script>'], 'Metrics': {'BlendedCost': {'Amount': '10.00'}}}
+        ]
+    }]
+})
+
+
+def _all_of(*needles):
+    """Expected substrings plus one compiled alternation matching them all.
+
+    The alternation sits in a zero-width lookahead, so findall() reports every
+    needle in a single pass over the text, even one starting inside another.
+    """
+    return frozenset(needles), re.compile('(?=(%s))' % '|'.join(map(re.escape, needles)))
+
+
+# (cost data, expected subject, {email part: expected substrings})
+CASES = [
+    pytest.param(
+        _SAMPLE_COST_DATA,
+        'AWS Daily Cost Report - $123.45',
+        # Content has key information
+        {'text': _all_of('Total Cost: $123.45', 'Amazon S3', '$50.00')},
+        id='with_data'
+    ),
+    pytest.param(
+        _EMPTY_COST_DATA,
+        'AWS Daily Cost Report - No Data',
+        # Handles empty data without crashing
+        {'text': _all_of('No cost data available'), 'html': _all_of('No cost data available')},
+        id='no_data'
+    ),
+]
+
+
+@pytest.mark.parametrize('data,subject,checks', CASES)
+def test_format_email(data, subject, checks):
+    """Test email formatting with realistic and empty cost data"""
     result = format_email(data)
 
-    # Verify subject line
-    assert result['subject'] == 'AWS Daily Cost Report - $123.45'
+    assert result['subject'] == subject
+    for key, (needles, pattern) in checks.items():
+        assert not needles - set(pattern.findall(result[key]))
+
+
+def test_format_email_escapes_service_names():
+    """Test service names are HTML-escaped in the email body"""
+    result = format_email(_UNSAFE_NAME_COST_DATA)
+
+    assert '<script>' not in result['html']
+    assert '&lt;script&gt;alert(1)&lt;/script&gt;' in result['html']
+
+
+def test_claim_report_detects_duplicate():
+    """Test a failed conditional write is reported as already sent"""
+    table = mock.Mock()
+    table.put_item.side_effect = ClientError(
+        {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'exists'},
+         'Item': {'status': {'S': 'sent'}}},
+        'PutItem'
+    )
+
+    with mock.patch.object(lambda_function, '_tracking_table', return_value=table):
+        assert lambda_function.claim_report('2024-09-16') is False
+
+    # Claim must be a single conditional write, not a read first
+    assert 'ConditionExpression' in table.put_item.call_args.kwargs
+    table.get_item.assert_not_called()
+
+
+def test_claim_report_raises_on_live_pending_claim():
+    """Test a claim still held by another run fails so the invocation is retried"""
+    table = mock.Mock()
+    table.put_item.side_effect = ClientError(
+        {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'exists'},
+         'Item': {'status': {'S': 'pending'}}},
+        'PutItem'
+    )
+
+    with mock.patch.object(lambda_function, '_tracking_table', return_value=table):
+        with pytest.raises(lambda_function.CostNotifierError):
+            lambda_function.claim_report('2024-09-16')
+
+    assert table.put_item.call_args.kwargs['ReturnValuesOnConditionCheckFailure'] == 'ALL_OLD'
+
 
-    # Verify content has key information
-    assert 'Total Cost: $123.45' in result['text']
-    assert 'Amazon S3' in result['text']
-    assert '$50.00' in result['text']
+def test_lambda_handler_skips_duplicate_report():
+    """Test no email is sent when the report date was already claimed"""
+    with mock.patch.object(lambda_function, '_tracking_table'), \
+            mock.patch.object(lambda_function, '_cost_explorer'), \
+            mock.patch.object(lambda_function, 'claim_report', return_value=False), \
+            mock.patch.object(lambda_function, 'get_cost_data', return_value={'ResultsByTime': []}), \
+            mock.patch.object(lambda_function, 'send_email') as send_email:
+        response = lambda_function.lambda_handler({}, None)
 
+    assert json.loads(response['body'])['duplicate_prevented'] is True
+    send_email.assert_not_called()
 
-def test_format_email_no_data():
-    """Test email formatting handles empty data gracefully"""
-    from lambda_function import format_email
 
-    result = format_email({'ResultsByTime': []})
+def test_lambda_handler_releases_claim_on_failure():
+    """Test a failed cost query releases the claim so a retry can send"""
+    with mock.patch.object(lambda_function, '_tracking_table'), \
+            mock.patch.object(lambda_function, '_cost_explorer'), \
+            mock.patch.object(lambda_function, 'claim_report', return_value=True), \
+            mock.patch.object(lambda_function, 'get_cost_data',
+                              side_effect=lambda_function.CostNotifierError('boom')), \
+            mock.patch.object(lambda_function, 'release_claim') as release_claim:
+        with pytest.raises(lambda_function.CostNotifierError):
+            lambda_function.lambda_handler({}, None)
 
-    # Should handle empty data without crashing
-    assert 'No cost data available' in result['text']
-    assert 'No cost data available' in result['html']
\ No newline at end of file
+    release_claim.assert_called_once()
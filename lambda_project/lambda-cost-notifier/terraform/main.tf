@@ -149,8 +149,9 @@ resource "aws_iam_policy" "lambda_policy" {
       {
         Effect = "Allow"
         Action = [
-          "dynamodb:GetItem",        # Check if notification already sent today
-          "dynamodb:PutItem"         # Record execution to prevent duplicates
+          "dynamodb:PutItem",        # Conditionally claim the report date (prevents duplicates)
+          "dynamodb:UpdateItem",     # Record the sent email against the claim
+          "dynamodb:DeleteItem"      # Release the claim when sending fails
         ]
         Resource = aws_dynamodb_table.cost_notifier_tracking.arn  # Only tracking table
       }